@@ -0,0 +1,209 @@
+import csv
+import operator
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Generic, List, Optional, Tuple, Type, TypeVar
+
+import pandas as pd
+from pydantic import BaseModel
+
+from app.crud.unit_of_work import UnitOfWork
+
+T = TypeVar("T", bound=BaseModel)
+
+# How many rows looked up by id each table keeps ready-made
+ROW_CACHE_SIZE = 4096
+
+
+class Table(Generic[T]):
+    """
+    A CSV file of `model` rows. The parsed file is cached as a DataFrame indexed
+    by string id and only re-read when the file's mtime changes. The cached frame
+    is only ever replaced, never edited: updates work on a copy that is written
+    back, or that a UnitOfWork holds until commit.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        model: Type[T],
+        columns: List[str],
+        dtype: Dict[str, object],
+        datetime_columns: Optional[List[str]] = None,
+        id_col: str = "id",
+        **read_options,
+    ):
+        self.path = path
+        self.model = model
+        self.columns = columns
+        self.dtype = dtype
+        self.datetime_columns = datetime_columns or []
+        self.id_col = id_col
+        self.read_options = read_options
+        # pulls a row's values out in CSV column order, built once instead of per appended row
+        self._row_values = operator.attrgetter(*columns)
+
+        self._cache: Optional[Tuple[Tuple[int, int], pd.DataFrame]] = None
+        # LRU of field dicts for rows looked up by id, cleared with the frame cache
+        self._rows: "OrderedDict[str, dict]" = OrderedDict()
+        self._next_id: Optional[int] = None
+        self._next_id_lock = threading.RLock()
+        # held while the file is rewritten or appended to, and by a unit of work from its first edit until it ends
+        self.lock = threading.RLock()
+
+    def frame(self) -> pd.DataFrame:
+        """
+        The cached id-indexed DataFrame, re-parsed if the file changed on disk.
+        """
+        # size too, so an append landing in the same mtime tick still counts as a change
+        stat = os.stat(self.path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        if self._cache and self._cache[0] == version:
+            return self._cache[1]
+
+        df = pd.read_csv(self.path, engine="pyarrow", dtype=self.dtype, **self.read_options).set_index(self.id_col)
+        self._rows.clear()
+        for col in self.datetime_columns:
+            # Timestamps repeat a lot, so let to_datetime memoize string -> Timestamp.
+            # Naive stamps are taken as UTC so the column sorts as one datetime64 array.
+            df[col] = pd.to_datetime(df[col], format="ISO8601", utc=True, cache=True)
+        self._cache = (version, df)
+        self._skip_taken_ids(df.index)
+        return df
+
+    def drop_cache(self):
+        self._cache = None
+        self._rows.clear()
+
+    def read(self) -> pd.DataFrame:
+        return self.frame().reset_index()
+
+    def write(self, df: pd.DataFrame):
+        with self.lock:
+            df.to_csv(self.path, index=False)
+            self.drop_cache()
+
+    def append(self, rows: List[T]):
+        # Columns in the same order as the CSV header, datetimes formatted like to_csv does
+        with self.lock, open(self.path, "a", newline="") as f:
+            csv.writer(f, lineterminator=os.linesep).writerows([
+                value.isoformat(sep=" ") if isinstance(value, datetime) else value
+                for value in self._row_values(row)
+            ] for row in rows)
+            self.drop_cache()
+
+    def new_id(self) -> str:
+        """
+        Next free id. The counter is seeded from the largest id on disk on first
+        use rather than at import, since run_init() may rewrite the data after import.
+        Each re-read of the file moves it past ids written by anyone else.
+        """
+        with self._next_id_lock:
+            ids = self.frame().index
+            if self._next_id is None:
+                self._next_id = 1 if ids.empty else int(ids.astype(int).max()) + 1
+            next_id = self._next_id
+            self._next_id += 1
+            return str(next_id)
+
+    def _skip_taken_ids(self, ids: pd.Index):
+        # never go back below the counter, ids already handed out may still be staged
+        with self._next_id_lock:
+            if self._next_id is not None and not ids.empty:
+                self._next_id = max(self._next_id, int(ids.astype(int).max()) + 1)
+
+    def get(self, row_id: str) -> Optional[T]:
+        df = self.frame()
+
+        fields = self._rows.get(row_id)
+        if fields is not None:
+            self._rows.move_to_end(row_id)
+        elif row_id in df.index:
+            fields = {self.id_col: row_id, **df.loc[row_id].to_dict()}
+            self._rows[row_id] = fields
+            if len(self._rows) > ROW_CACHE_SIZE:
+                self._rows.popitem(last=False)
+        else:
+            return None
+
+        # a fresh model per call, so callers can't mutate the cached fields
+        return self.model.model_construct(**fields)
+
+    def all(self) -> List[T]:
+        records = self.read().to_dict(orient="records")
+        return [self.model.model_construct(**record) for record in records]
+
+    def insert(self, row: T, uow: Optional[UnitOfWork] = None):
+        if uow is None:
+            self.append([row])
+        else:
+            uow.stage(self, row)
+
+    def insert_many(self, rows: List[T], uow: Optional[UnitOfWork] = None):
+        if uow is None:
+            self.append(rows)
+        else:
+            uow.stage_many(self, rows)
+
+    def update(self, row_id: str, update_data: dict, uow: Optional[UnitOfWork] = None) -> Optional[T]:
+        with self.lock:
+            df = self._editable_frame(uow)
+
+            if row_id not in df.index:
+                return None
+            for key, value in update_data.items():
+                if value is not None:
+                    df.at[row_id, key] = value
+            if uow is None:
+                self.write(df.reset_index())
+            return self._row_at(df, row_id)
+
+    def increment(
+        self, row_id: str, column: str, delta: int, minimum: Optional[int] = None, uow: Optional[UnitOfWork] = None
+    ) -> Optional[T]:
+        """
+        Adds `delta` to one row's `column`. With `minimum`, the row is only changed
+        if the new value stays at or above it, so the check and the write happen in
+        one call. Returns None when the row is missing or the check fails.
+        """
+        with self.lock:
+            df = self._editable_frame(uow)
+
+            if row_id not in df.index:
+                return None
+            value = df.at[row_id, column] + delta
+            if minimum is not None and value < minimum:
+                return None
+            df.at[row_id, column] = value
+            if uow is None:
+                self.write(df.reset_index())
+            return self._row_at(df, row_id)
+
+    def update_many(self, row_ids: List[str], update_data: dict, uow: Optional[UnitOfWork] = None) -> List[str]:
+        """
+        Applies the same update to several rows with one vectorized assignment.
+        Returns the ids that were not found.
+        """
+        with self.lock:
+            df = self._editable_frame(uow)
+            found = df.index.intersection(row_ids)
+
+            if not found.empty:
+                for key, value in update_data.items():
+                    if value is not None:
+                        df.loc[found, key] = value
+                if uow is None:
+                    self.write(df.reset_index())
+
+        found_ids = set(found)
+        return [row_id for row_id in row_ids if row_id not in found_ids]
+
+    def _editable_frame(self, uow: Optional[UnitOfWork]) -> pd.DataFrame:
+        # edits never touch the shared cached frame: they go into the unit of work's
+        # copy, or into a copy that is written straight back (the caller holds the lock)
+        return self.frame().copy() if uow is None else uow.frame(self)
+
+    def _row_at(self, df: pd.DataFrame, row_id: str) -> T:
+        return self.model.model_construct(**{self.id_col: row_id}, **df.loc[row_id].to_dict())
@@ -1,8 +1,10 @@
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 import pandas as pd
 
+from app.crud._table import Table
+from app.crud.unit_of_work import UnitOfWork
 from app.models.payer import Payer
 
 # Get the absolute path to the script's directory
@@ -11,56 +13,39 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 # Construct the absolute path to the CSV file relative to this script
 DATA_FILE = os.path.join(SCRIPT_DIR, "../../data/payers.csv")
 
+payers = Table(DATA_FILE, Payer, columns=["id", "name", "points"], dtype={"id": str, "points": "int64"})
+
 def read_payers_from_csv():
-    df = pd.read_csv(DATA_FILE)
-    return df
+    return payers.read()
 
 def write_payers_to_csv(df: pd.DataFrame):
-    df.to_csv(DATA_FILE, index=False)
+    payers.write(df)
 
 def get_payer_by_id(payer_id: str):
-    # print(DATA_FILE)
-    df = read_payers_from_csv()
-    # print(df)
-
-    df['id'] = df['id'].astype(str)
-    payer_row = df[df['id'] == payer_id]
-    # print(payer_row)
+    return payers.get(payer_id)
 
-    if not payer_row.empty:
-        row = payer_row.iloc[0]
-        return Payer(id=row['id'], name=row['name'], points=row['points'])
-    return None
+def update_payer(payer_id: int, update_data: dict, uow: Optional[UnitOfWork] = None) -> Optional[Payer]:
+    return payers.update(payer_id, update_data, uow=uow)
 
-def update_payer(payer_id: int, update_data: dict) -> Optional[Payer]:
-    df = read_payers_from_csv()
+def add_payer_points(payer_id: str, points: int, uow: Optional[UnitOfWork] = None) -> Optional[Payer]:
+    return payers.increment(payer_id, "points", points, uow=uow)
 
-    df['id'] = df['id'].astype(str)
-    indices = df.index[df["id"] == payer_id]
-    
-    if not indices.empty:
-        idx = indices[0]
-        for key, value in update_data.items():
-            if value is not None:
-                df.at[idx, key] = value
-        write_payers_to_csv(df)
-        row = df.iloc[idx]
-        return Payer(id=row["id"], name=row["name"], points=row["points"])
-    return None
+def deduct_payer_points(payer_id: str, points: int, uow: Optional[UnitOfWork] = None) -> Optional[Payer]:
+    """
+    Takes `points` off the payer's balance if it covers them. Returns None, leaving
+    the balance untouched, when the payer is missing or doesn't have enough points.
+    """
+    return payers.increment(payer_id, "points", -points, minimum=0, uow=uow)
 
 def get_all_payers() -> List[Payer]:
     """
     Reads all payers from the CSV file and returns them as a list of Payer objects.
     """
-    df = read_payers_from_csv()
+    return payers.all()
 
-    # Ensure 'id' column is treated as a string
-    df["id"] = df["id"].astype(str)
-
-    # Convert DataFrame rows to a list of Payer objects
-    payers = [
-        Payer(id=row["id"], name=row["name"], points=row["points"])
-        for _, row in df.iterrows()
-    ]
-
-    return payers
+def get_all_payers_as_balance_dict() -> Dict[str, int]:
+    """
+    Reads all payers and returns their balances as {payer name: points}.
+    """
+    df = payers.frame()
+    return dict(zip(df["name"].tolist(), df["points"].tolist()))
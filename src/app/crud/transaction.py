@@ -1,8 +1,12 @@
 import os
 from typing import List, Optional
+import numpy as np
 import pandas as pd
 
 from datetime import datetime
+from app.crud._table import Table
+from app.crud.payer import payers
+from app.crud.unit_of_work import UnitOfWork
 from app.models.transaction import Transaction
 
 # Get the absolute path to the script's directory
@@ -11,17 +15,24 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 # Construct the absolute path to the CSV file relative to this script
 DATA_FILE = os.path.join(SCRIPT_DIR, "../../data/transactions.csv")
 
+transactions = Table(
+    DATA_FILE,
+    Transaction,
+    columns=["id", "payer_id", "user_id", "points", "timestamp", "expired"],
+    dtype={"id": str, "payer_id": str, "user_id": str, "points": "int64", "timestamp": str, "expired": bool},
+    datetime_columns=["timestamp"],
+    true_values=["True"],
+    false_values=["False"],
+)
+
 def read_transactions_from_csv():
-    df = pd.read_csv(DATA_FILE)
-    return df
+    return transactions.read()
 
 def write_transactions_to_csv(df: pd.DataFrame):
-    df.to_csv(DATA_FILE, index=False)
+    transactions.write(df)
 
-def create_transaction(transaction_data: dict) -> Optional[Transaction]:
-    df = read_transactions_from_csv()
-    new_id = 1 if df.empty else int(df["id"].max()) + 1
-    transaction_data["id"] = str(new_id)
+def create_transaction(transaction_data: dict, uow: Optional[UnitOfWork] = None) -> Optional[Transaction]:
+    transaction_data["id"] = transactions.new_id()
 
     try:
         transaction = Transaction(**transaction_data, expired=False)
@@ -29,73 +40,81 @@ def create_transaction(transaction_data: dict) -> Optional[Transaction]:
         print(f"Failed to create transaction: {e}")
         return None
 
-    new_row = pd.DataFrame([{**transaction_data, "expired" : False}])
-    df = pd.concat([df, new_row], ignore_index=True)
-
-    write_transactions_to_csv(df)
+    transactions.insert(transaction, uow=uow)
     return transaction
 
+def create_transactions(
+    transactions_data: List[dict], uow: Optional[UnitOfWork] = None, validate: bool = True
+) -> List[Optional[Transaction]]:
+    """
+    Creates several transactions and hands them to the table in one insert,
+    so they are appended with a single write. With validate=False the dicts are
+    trusted and stored as-is, without going through pydantic.
+    """
+    created = []
+    for transaction_data in transactions_data:
+        transaction_data["id"] = transactions.new_id()
+        if not validate:
+            created.append(Transaction.model_construct(**transaction_data, expired=False))
+            continue
+        try:
+            created.append(Transaction(**transaction_data, expired=False))
+        except Exception as e:
+            print(f"Failed to create transaction: {e}")
+            created.append(None)
+
+    transactions.insert_many([transaction for transaction in created if transaction is not None], uow=uow)
+    return created
+
+def _user_transaction_positions(df: pd.DataFrame, user_id: str, limit: Optional[int] = None) -> np.ndarray:
+    # single pass over the raw numpy arrays instead of three pandas Series,
+    # then sort only the surviving rows (stable, so ties keep file order)
+    mask = (df["user_id"].values == user_id) & ~df["expired"].values & (df["points"].values > 0)
+    selected = np.flatnonzero(mask)
+    order = selected[np.argsort(df["timestamp"].values[selected], kind="stable")]
+    return order if limit is None else order[:limit]
+
 def get_all_transactions_with_user_id(user_id: str):
-    # also sort by timestamp ascendaing
-    # TODO: only take non-expired one and positive points too
-    df = read_transactions_from_csv()
-    # Ensure 'user_id' and 'id' are strings
-    df["user_id"] = df["user_id"].astype(str)
-    df["payer_id"] = df["payer_id"].astype(str)
-    df["id"] = df["id"].astype(str)
-
-    # Ensure 'expired' column is treated as boolean
-    df["expired"] = df["expired"].astype(bool)
-
-    filtered_df = df[(df["user_id"] == user_id) & (df["expired"] == False) & (df["points"] > 0)]
-    filtered_df = filtered_df.sort_values(by="timestamp", ascending=True)
-    
-    return [
-        Transaction(
-            id=row["id"],
-            user_id=row["user_id"],
-            payer_id=row["payer_id"],
-            points=row["points"],
-            timestamp=row["timestamp"],
-            expired=row["expired"]
-        )
-        for _, row in filtered_df.iterrows()
-    ]
+    df = transactions.frame()
+    filtered_df = df.take(_user_transaction_positions(df, user_id)).reset_index()
+
+    records = filtered_df.to_dict(orient="records")
+    return [Transaction.model_construct(**record) for record in records]
+
+def get_user_transactions_projected(user_id: str, limit: Optional[int] = None) -> List[tuple]:
+    """
+    Same rows as get_all_transactions_with_user_id, but as plain namedtuples of
+    (id, points, timestamp, user_id, payer_id, payer_name) with no models built.
+    `limit` caps how many of the oldest rows are returned.
+    """
+    df = transactions.frame()
+    filtered_df = df.take(_user_transaction_positions(df, user_id, limit))[["points", "timestamp", "user_id", "payer_id"]]
+    # join the payer names in by id instead of loading Payer objects
+    filtered_df["payer_name"] = payers.frame()["name"].reindex(filtered_df["payer_id"]).values
+    return list(filtered_df.reset_index().itertuples(index=False, name="Row"))
 
 def update_transaction_expiry(transaction_id: str):
-    df = read_transactions_from_csv()
-
-    # Ensure 'id' column is treated as string
-    df["id"] = df["id"].astype(str)
-
-    # Check if transaction_id exists in the DataFrame
-    if transaction_id not in df["id"].values:
+    # Update the 'expired' field to True for the matching transaction
+    if transactions.update(transaction_id, {"expired": True}) is None:
         print(f"Transaction ID {transaction_id} not found.")
         return False
 
-    # Update the 'expired' field to True for the matching transaction
-    df.loc[df["id"] == transaction_id, "expired"] = True
-
-    # Save the updated DataFrame back to CSV
-    write_transactions_to_csv(df)
-    
     return True
 
-def update_transaction_points(transaction_id: str, points: int):
-    df = read_transactions_from_csv()
+def update_transactions_expiry(transaction_ids: List[str], uow: Optional[UnitOfWork] = None):
+    """
+    Marks several transactions expired with one vectorized update of the frame.
+    """
+    missing = transactions.update_many(transaction_ids, {"expired": True}, uow=uow)
+    for transaction_id in missing:
+        print(f"Transaction ID {transaction_id} not found.")
 
-    # Ensure 'id' column is treated as string
-    df["id"] = df["id"].astype(str)
+    return not missing
 
-    # Check if transaction_id exists in the DataFrame
-    if transaction_id not in df["id"].values:
+def update_transaction_points(transaction_id: str, points: int):
+    # Update the 'points' field for the matching transaction
+    if transactions.update(transaction_id, {"points": points}) is None:
         print(f"Transaction ID {transaction_id} not found.")
         return False
 
-    # Update the 'points' field to True for the matching transaction
-    df.loc[df["id"] == transaction_id, "points"] = points
-
-    # Save the updated DataFrame back to CSV
-    write_transactions_to_csv(df)
-    
     return True
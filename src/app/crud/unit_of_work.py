@@ -0,0 +1,72 @@
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+import pandas as pd
+
+if TYPE_CHECKING:
+    from app.crud._table import Table
+
+
+class UnitOfWork:
+    """
+    Collects the CSV writes made by CRUD helpers inside a `with` block and
+    flushes each touched file once on commit(). Writes that were not
+    committed when the block exits are discarded.
+
+    Edits go into a private copy of each table's frame, so nobody else sees
+    them before commit, and the table stays locked from the first edit until
+    commit or exit, so two units of work can't edit the same file at once.
+    Tables should be edited in the same order everywhere (users, payers,
+    transactions) so two units of work never wait on each other.
+    """
+
+    def __init__(self):
+        self._frames: Dict[str, Tuple["Table", pd.DataFrame]] = {}
+        self._rows: Dict[str, Tuple["Table", List]] = {}
+
+    def __enter__(self) -> "UnitOfWork":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # uncommitted edits only ever lived in our copies, so dropping them is enough
+        self._clear()
+
+    def frame(self, table: "Table") -> pd.DataFrame:
+        """
+        This unit of work's copy of the table's frame. The first call locks the
+        table and copies its current contents; later calls return the same copy.
+        """
+        if table.path not in self._frames:
+            table.lock.acquire()
+            try:
+                df = table.frame().copy()
+            except BaseException:
+                table.lock.release()
+                raise
+            self._frames[table.path] = (table, df)
+        return self._frames[table.path][1]
+
+    def stage(self, table: "Table", row):
+        """
+        Schedules `row` to be appended to the table on commit.
+        """
+        self._rows.setdefault(table.path, (table, []))[1].append(row)
+
+    def stage_many(self, table: "Table", rows: List):
+        """
+        Schedules several rows to be appended to the table on commit.
+        """
+        self._rows.setdefault(table.path, (table, []))[1].extend(rows)
+
+    def commit(self):
+        # rewrite edited files first, so staged rows land after their new contents
+        for table, df in self._frames.values():
+            table.write(df.reset_index())
+        for table, rows in self._rows.values():
+            table.append(rows)
+        self._clear()
+
+    def _clear(self):
+        for table, _ in self._frames.values():
+            table.lock.release()
+        self._frames.clear()
+        self._rows.clear()
@@ -1,9 +1,7 @@
+import numpy as np
 import pandas as pd
 import os
-import random
-from datetime import datetime
-
-import pytz
+from datetime import datetime, timezone
 
 def run_migration():
     output_dir = os.path.join(os.path.dirname(__file__), '../data/')
@@ -29,29 +27,23 @@ def synchronize_balances(users_path, payers_path, transactions_path):
     """
     Synchronizes balances by applying transaction points to users and payers.
     """
-    users_df = pd.read_csv(users_path)
-    payers_df = pd.read_csv(payers_path)
-    transactions_df = pd.read_csv(transactions_path)
-
-    # Ensure correct data types
-    users_df["id"] = users_df["id"].astype(str)
-    payers_df["id"] = payers_df["id"].astype(str)
-    transactions_df["user_id"] = transactions_df["user_id"].astype(str)
-    transactions_df["payer_id"] = transactions_df["payer_id"].astype(str)
-
-    # Iterate through transactions and update user & payer balances
-    for _, transaction in transactions_df.iterrows():
-        user_id = transaction["user_id"]
-        payer_id = transaction["payer_id"]
-        points = transaction["points"]
-
-        # Update user and payer balances based on points
-        users_df.loc[users_df["id"] == user_id, "points"] += points
-        payers_df.loc[payers_df["id"] == payer_id, "points"] -= points
+    # Read ids as strings so they line up with the transaction foreign keys
+    users_df = pd.read_csv(users_path, dtype={"id": str})
+    payers_df = pd.read_csv(payers_path, dtype={"id": str})
+    transactions_df = pd.read_csv(transactions_path, dtype={"user_id": str, "payer_id": str})
+
+    # Total points per user & payer, then apply them in one aligned add/sub
+    user_deltas = transactions_df.groupby("user_id")["points"].sum()
+    payer_deltas = transactions_df.groupby("payer_id")["points"].sum()
+
+    users_df = users_df.set_index("id")
+    users_df["points"] = users_df["points"].add(user_deltas, fill_value=0).astype(int)
+    payers_df = payers_df.set_index("id")
+    payers_df["points"] = payers_df["points"].sub(payer_deltas, fill_value=0).astype(int)
 
     # Save the updated data back to CSV
-    users_df.to_csv(users_path, index=False)
-    payers_df.to_csv(payers_path, index=False)
+    users_df.reset_index().to_csv(users_path, index=False)
+    payers_df.reset_index().to_csv(payers_path, index=False)
 
 def run_seed():
     """
@@ -89,30 +81,23 @@ def run_seed():
 
     # Seed transactions if empty
     if transactions_df.empty:
-        transactions = []
-        user_ids = users_df['id'].tolist()
-        payer_ids = payers_df['id'].tolist()
-
-        random.seed(42)  
-
-        for i in range(1, 10):
-            transaction = {
-                'id': f'{i}',
-                # 'payer_id': random.choice(payer_ids),
-                # 'user_id': random.choice(user_ids),
-                'payer_id': "1",
-                'user_id': "1",
-                'points': random.randint(1, 10),  # Allow both positive and negative transactions
-                'timestamp': datetime.utcnow().replace(tzinfo=pytz.UTC),
-                'expired': False
-            }
-            transactions.append(transaction)
-
-        transactions_df = pd.DataFrame(transactions)
+        n = 9
+        # One clock read, stamps spaced 1us apart so the seeded rows keep their order
+        now = pd.Timestamp(datetime.now(timezone.utc))
+
+        transactions_df = pd.DataFrame({
+            'id': np.arange(1, n + 1).astype(str),
+            'payer_id': "1",
+            'user_id': "1",
+            'points': np.random.default_rng(42).integers(1, 11, size=n),
+            'timestamp': now + pd.to_timedelta(np.arange(n), unit='us'),
+            'expired': False
+        })
         transactions_df.to_csv(transactions_path, index=False)
 
-    # After seeding, synchronize balances
-    synchronize_balances(users_path, payers_path, transactions_path)
+        # After seeding, synchronize balances. Only for freshly seeded transactions,
+        # existing balances already include theirs.
+        synchronize_balances(users_path, payers_path, transactions_path)
 
 
 
@@ -131,3 +116,33 @@ def run_init():
     run_drop()
     run_migration()
     run_seed()
+
+def run_startup():
+    """
+    Prepares data/ when the app (or each worker) starts. APP_INIT_MODE=reset drops
+    and reseeds everything. Otherwise only the first start does anything: the one
+    process that manages to create the data/.initialized marker creates missing CSVs
+    and seeds empty ones, and existing data is never deleted.
+    """
+    output_dir = os.path.join(os.path.dirname(__file__), '../data/')
+    marker_path = os.path.join(output_dir, '.initialized')
+
+    if os.environ.get('APP_INIT_MODE') == 'reset':
+        run_init()
+        open(marker_path, 'w').close()
+        return
+
+    # claim the marker atomically, so two workers starting together don't both initialise
+    os.makedirs(output_dir, exist_ok=True)
+    try:
+        os.close(os.open(marker_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        return
+
+    try:
+        run_migration()
+        run_seed()
+    except BaseException:
+        # let the next start try again
+        os.remove(marker_path)
+        raise
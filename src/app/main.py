@@ -2,9 +2,9 @@ from fastapi import FastAPI
 from app.routers.transaction import router as transactions_router
 from app.routers.user import router as users_router
 from app.routers.payer import router as payers_router
-from app.dependencies import run_init
+from app.dependencies import run_startup
 
-run_init()
+run_startup()
 app = FastAPI(title="Fetch Rewards Exercise")
 app.include_router(transactions_router, prefix="/transactions")
 app.include_router(users_router, prefix = "/users")
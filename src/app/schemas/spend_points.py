@@ -1,6 +1,6 @@
 from enum import Enum
 from typing import List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class SpendPointsMessage(str, Enum):
     MSG_SUCCESS_POINTS_SPEND = "points succesfully spent by user"
@@ -11,7 +11,7 @@ class SpendPointsErrorCode(str, Enum):
 
 class SpendPointsDataRequest(BaseModel):
     user_id: str
-    points: int
+    points: int = Field(gt=0)
 
 class SpendPointsDataResponse(BaseModel):
     payer: str
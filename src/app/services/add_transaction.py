@@ -1,16 +1,19 @@
 from datetime import datetime
-from typing import Self
+from typing import Optional, Self
 from app.crud.payer import (
-    get_payer_by_id,
-    update_payer
+    add_payer_points,
+    deduct_payer_points,
+    get_payer_by_id
 )
 from app.crud.user import (
-    get_user_by_id,
-    update_user
+    add_user_points,
+    deduct_user_points,
+    get_user_by_id
 )
 from app.crud.transaction import (
     create_transaction
 )
+from app.crud.unit_of_work import UnitOfWork
 from app.schemas.transaction import (
     TransactionDataRequest,
     TransactionResponseSuccess,
@@ -21,77 +24,75 @@ from app.schemas.transaction import (
 
 class AddTransaction:
     @staticmethod
-    def add_transaction(request: TransactionDataRequest):
+    def add_transaction(request: TransactionDataRequest, uow: Optional[UnitOfWork] = None):
+        if uow is None:
+            with UnitOfWork() as uow:
+                response = AddTransaction.add_transaction(request, uow=uow)
+                uow.commit()
+            return response
 
-        # get payer and user
-        payer = get_payer_by_id(request.payer_id)
-        user = get_user_by_id(request.user_id)
-
-        # print(payer.points, "\n" ,user.points)
+        # Balances only change through increments under the unit of work's table locks,
+        # users first and then payers like spend_points, so no other request can change
+        # them between the check and the write.
         if request.points > 0: # points > 0 --> user adds points, payer reduce points
-            if request.points > payer.points:
+            user = add_user_points(request.user_id, request.points, uow=uow)
+            if user is None:
+                raise ValueError(f"User ID {request.user_id} not found.")
+
+            payer = deduct_payer_points(request.payer_id, request.points, uow=uow)
+            if payer is None:
+                if get_payer_by_id(request.payer_id) is None:
+                    raise ValueError(f"Payer ID {request.payer_id} not found.")
+                # payer can't cover it: take the user's credit back out of the unit of work
+                add_user_points(user.id, -request.points, uow=uow)
                 return TransactionResponseFailed(
                     success=False,
                     message=TransactionMessage.MSG_FAILED_PAYER_NOT_ENOUGH,
                     error_code=TransactionErrorCode.ERR_FAILED_PAYER_NOT_ENOUGH
                 )
-            else: # enough money
-                # business logic
-                # print(user.id, user)
-                # print(payer.id, payer)
-
-                user.points += request.points
-                payer.points -= request.points
 
-                # update in db
-                update_user(user_id=user.id, update_data = { "points" : user.points })
-                update_payer(payer_id=payer.id, update_data = { "points" : payer.points })
-
-                create_transaction(
-                    transaction_data = {
-                        "user_id": user.id,
-                        "payer_id": payer.id,
-                        "points": request.points,
-                        "timestamp": request.timestamp
-                    }
-                )
+            create_transaction(
+                transaction_data = {
+                    "user_id": user.id,
+                    "payer_id": payer.id,
+                    "points": request.points,
+                    "timestamp": request.timestamp
+                },
+                uow=uow
+            )
 
-                # print(user)
-                # print(payer)
-                return TransactionResponseSuccess(
-                    success=True,
-                    message=TransactionMessage.MSG_SUCCESS_ADD_TO_USER,
-                    data=request
-                )
+            return TransactionResponseSuccess(
+                success=True,
+                message=TransactionMessage.MSG_SUCCESS_ADD_TO_USER,
+                data=request
+            )
         else: # request.points <= 0 --> user reduce points, payer adds points
-            if request.points > user.points:
+            user = deduct_user_points(request.user_id, -request.points, uow=uow)
+            if user is None:
+                if get_user_by_id(request.user_id) is None:
+                    raise ValueError(f"User ID {request.user_id} not found.")
                 return TransactionResponseFailed(
                     success=False,
                     message=TransactionMessage.MSG_FAILED_USER_NOT_ENOUGH,
                     error_code=TransactionErrorCode.ERR_FAILED_USER_NOT_ENOUGH
                 )
-            else: # enough money
-                user.points += request.points # this is a negative number
-                payer.points -= request.points
-
-                update_user(user_id=user.id, update_data = { "points" : user.points })
-                update_payer(payer_id=payer.id, update_data = { "points" : payer.points })
 
-                create_transaction(
-                    transaction_data = {
-                        "user_id": user.id,
-                        "payer_id": payer.id,
-                        "points": request.points,
-                        "timestamp": request.timestamp
-                    }
-                )
+            payer = add_payer_points(request.payer_id, -request.points, uow=uow)
+            if payer is None:
+                raise ValueError(f"Payer ID {request.payer_id} not found.")
 
+            create_transaction(
+                transaction_data = {
+                    "user_id": user.id,
+                    "payer_id": payer.id,
+                    "points": request.points,
+                    "timestamp": request.timestamp
+                },
+                uow=uow
+            )
 
-                # print(user)
-                # print(payer)
-
-                return TransactionResponseSuccess(
-                    success=True,
-                    message=TransactionMessage.MSG_SUCCESS_DEDUCT_FROM_USER,
-                    data=request
-                )
+            return TransactionResponseSuccess(
+                success=True,
+                message=TransactionMessage.MSG_SUCCESS_DEDUCT_FROM_USER,
+                data=request
+            )
@@ -1,7 +1,6 @@
 
-from datetime import datetime
+from datetime import datetime, timezone
 
-import pytz
 from app.schemas.spend_points import (
     SpendPointsDataRequest,
     SpendPointsResponseSuccess,
@@ -10,76 +9,90 @@ from app.schemas.spend_points import (
     SpendPointsErrorCode,
     SpendPointsDataResponse
 )
-from app.crud.user import get_user_by_id
-from app.crud.transaction import get_all_transactions_with_user_id, update_transaction_expiry, update_transaction_points
-from app.services.add_transaction import AddTransaction
-
-from app.models.transaction import Transaction
-from app.schemas.transaction import (
-    TransactionDataRequest
-)
-from app.crud.payer import get_payer_by_id
+from app.crud.user import deduct_user_points
+from app.crud.payer import add_payer_points
+from app.crud.transaction import get_user_transactions_projected, create_transactions, update_transactions_expiry
+from app.crud.unit_of_work import UnitOfWork
 
 
 class SpendPoints:
     @staticmethod
     def spend_points(request: SpendPointsDataRequest):
-        # get user by id
-        user = get_user_by_id(request.user_id)
-        # print("USER",user) # OK
-
-        # not enough points
-        if request.points > user.points:
-            return SpendPointsResponseFailed(
-                success=False,
-                message=SpendPointsMessage.MSG_FAILED_NOT_ENOUGH_USER_POINTS,
-                error_code=SpendPointsErrorCode.ERR_FAILED_NOT_ENOUGH_USER_POINTS
-            )
+        # every write of the spend goes through one unit of work, flushed once
+        with UnitOfWork() as uow:
+            # check and take the points off the user in one step. The users table stays
+            # locked until this unit of work ends, and add_transaction changes balances
+            # the same way, so no other spend or add can touch the balance in between.
+            user = deduct_user_points(request.user_id, request.points, uow=uow)
 
-        else: # enough points
+            # not enough points, nothing was changed
+            if user is None:
+                return SpendPointsResponseFailed(
+                    success=False,
+                    message=SpendPointsMessage.MSG_FAILED_NOT_ENOUGH_USER_POINTS,
+                    error_code=SpendPointsErrorCode.ERR_FAILED_NOT_ENOUGH_USER_POINTS
+                )
 
             # get all transactions that has user_id of request.user_id
-            transactions = get_all_transactions_with_user_id(user.id) # sorted ascending
+            # every live transaction holds at least 1 point, so no spend needs more rows than points
+            transactions = get_user_transactions_projected(user.id, limit=request.points) # sorted ascending
 
-            new_transactions_log = SpendPoints.__deduct_points(transactions, request.points)
+            new_transactions_log = SpendPoints.__deduct_points(transactions, request.points, uow)
+            uow.commit()
 
-            return SpendPointsResponseSuccess(
-                success=True,
-                message=SpendPointsMessage.MSG_SUCCESS_POINTS_SPEND,
-                data=new_transactions_log
-            )
+        return SpendPointsResponseSuccess(
+            success=True,
+            message=SpendPointsMessage.MSG_SUCCESS_POINTS_SPEND,
+            data=new_transactions_log
+        )
     
     @staticmethod
-    def __deduct_points(transactions, points_to_deduct):
+    def __deduct_points(transactions, points_to_deduct, uow: UnitOfWork):
 
-        new_transactions_log = []
-        
+        # phase 1: work out how much to take from each transaction, no I/O
+        plan = []
         for transaction in transactions:
-            # get payer
-            payer = get_payer_by_id(transaction.payer_id)
             if transaction.points <= points_to_deduct:
-                AddTransaction.add_transaction(TransactionDataRequest(user_id=transaction.user_id, payer_id=transaction.payer_id, points=-1*transaction.points, timestamp=datetime.utcnow().replace(tzinfo=pytz.UTC)))
-                update_transaction_expiry(transaction_id=transaction.id)
-                new_transactions_log.append(
-                    SpendPointsDataResponse(
-                        payer= payer.name,
-                        points= -1*transaction.points
-                    )
-                )
+                plan.append((transaction, transaction.points))
                 points_to_deduct -= transaction.points
+                if points_to_deduct == 0:
+                    break
             else: # transaction.points > points_to_deduct
-                AddTransaction.add_transaction(TransactionDataRequest(user_id=transaction.user_id, payer_id=transaction.payer_id, points=-1*points_to_deduct, timestamp=datetime.utcnow().replace(tzinfo=pytz.UTC)))
-                update_transaction_expiry(transaction_id=transaction.id)
+                plan.append((transaction, points_to_deduct))
+                break
 
-                AddTransaction.add_transaction(TransactionDataRequest(user_id=transaction.user_id, payer_id=transaction.payer_id, points=transaction.points-points_to_deduct, timestamp=transaction.timestamp))
+        # phase 2: turn the plan into ledger rows and the response, then write them in bulk
+        # all rows of one spend share a single timestamp
+        now = datetime.now(timezone.utc)
+        new_transactions_log = []
+        pending_inserts = []
+        payer_points = {} # points going back to each payer
+        for transaction, consumed in plan:
+            pending_inserts.append({"user_id": transaction.user_id, "payer_id": transaction.payer_id, "points": -1*consumed, "timestamp": now})
+            if consumed < transaction.points:
+                # re-add what is left of a partially spent transaction, keeping its
+                # timestamp, which is already a tz-aware UTC value from the loaded frame.
+                # The points never left the user, so no balance changes for this row.
+                remainder = transaction.points - consumed
+                pending_inserts.append({"user_id": transaction.user_id, "payer_id": transaction.payer_id, "points": remainder, "timestamp": transaction.timestamp})
+            payer_points[transaction.payer_id] = payer_points.get(transaction.payer_id, 0) + consumed
 
-                new_transactions_log.append(
-                    SpendPointsDataResponse(
-                        payer= payer.name,
-                        points= -1*points_to_deduct
-                    )
+            # built from our own rows, so skip validation
+            new_transactions_log.append(
+                SpendPointsDataResponse.model_construct(
+                    payer= transaction.payer_name,
+                    points= -1*consumed
                 )
-                points_to_deduct -= points_to_deduct
-                return new_transactions_log
-        
+            )
+
+        # the user's balance was already taken down in spend_points, so the ledger rows
+        # are written as-is and each payer gets back what was taken from it in one update
+        create_transactions(pending_inserts, uow=uow, validate=False)
+        for payer_id, points in payer_points.items():
+            # a ledger row pointing at an unknown payer: fail, so the unit of work is
+            # discarded instead of charging the user without crediting anyone
+            if add_payer_points(payer_id, points, uow=uow) is None:
+                raise ValueError(f"Payer ID {payer_id} not found.")
+        update_transactions_expiry([transaction.id for transaction, _ in plan], uow=uow)
+
         return new_transactions_log
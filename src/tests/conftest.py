@@ -0,0 +1,49 @@
+import os
+
+import pandas as pd
+import pytest
+
+from app.crud.payer import payers
+from app.crud.transaction import transactions
+from app.crud.unit_of_work import UnitOfWork
+from app.crud.user import users
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """
+    Points every table at a fresh copy of the seed data in a temporary directory,
+    so tests never write to src/data.
+    """
+    pd.DataFrame([
+        {"id": "1", "name": "Alice", "points": 100},
+        {"id": "2", "name": "Bob", "points": 0},
+    ]).to_csv(tmp_path / "users.csv", index=False)
+    pd.DataFrame([
+        {"id": "1", "name": "Amazon", "points": 1000},
+        {"id": "2", "name": "Google", "points": 1000},
+    ]).to_csv(tmp_path / "payers.csv", index=False)
+    pd.DataFrame([
+        {"id": "1", "payer_id": "1", "user_id": "1", "points": 60, "timestamp": "2020-01-01 00:00:00+00:00", "expired": False},
+        {"id": "2", "payer_id": "2", "user_id": "1", "points": 40, "timestamp": "2020-01-02 00:00:00+00:00", "expired": False},
+    ]).to_csv(tmp_path / "transactions.csv", index=False)
+
+    for table in (users, payers, transactions):
+        monkeypatch.setattr(table, "path", str(tmp_path / os.path.basename(table.path)))
+        monkeypatch.setattr(table, "_next_id", None)
+        table.drop_cache()
+
+    yield tmp_path
+
+    for table in (users, payers, transactions):
+        table.drop_cache()
+
+
+@pytest.fixture
+def uow():
+    """
+    A unit of work that is never committed, so everything written through it
+    is thrown away when the test ends.
+    """
+    with UnitOfWork() as uow:
+        yield uow
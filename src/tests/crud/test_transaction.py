@@ -0,0 +1,52 @@
+from datetime import datetime, timezone
+
+# imports should be relative to the directory you are running the file from
+from app.crud.transaction import create_transaction, transactions
+
+
+def test_create_transaction():
+    transaction_data = {
+        'payer_id': '1',
+        'user_id': '1',
+        'timestamp': datetime.now(timezone.utc),
+        'points': 2000
+    }
+
+    transaction = create_transaction(transaction_data)
+
+    assert transaction.id == '3'
+    assert transactions.get('3').points == 2000
+    assert len(transactions.read()) == 3
+
+
+def test_create_transaction_in_uncommitted_unit_of_work(uow):
+    transaction_data = {
+        'payer_id': '1',
+        'user_id': '1',
+        'timestamp': datetime.now(timezone.utc),
+        'points': 2000
+    }
+
+    create_transaction(transaction_data, uow=uow)
+
+    # staged rows are only appended on commit
+    assert transactions.get('3') is None
+    assert len(transactions.read()) == 2
+
+
+def test_create_transaction_after_outside_append(data_dir):
+    transaction_data = {
+        'payer_id': '1',
+        'user_id': '1',
+        'timestamp': datetime.now(timezone.utc),
+        'points': 2000
+    }
+    assert create_transaction(dict(transaction_data)).id == '3'
+
+    # another process appends the next id behind our back
+    with open(data_dir / "transactions.csv", "a") as f:
+        f.write("4,1,1,9,2020-01-03 00:00:00+00:00,False\n")
+
+    assert create_transaction(dict(transaction_data)).id == '5'
+    assert transactions.get('4').points == 9
+    assert transactions.read()['id'].is_unique
@@ -0,0 +1,31 @@
+import threading
+
+from app.crud.unit_of_work import UnitOfWork
+from app.crud.user import get_user_by_id, read_users_from_csv, update_user
+
+
+def test_uncommitted_edits_are_not_visible_outside():
+    with UnitOfWork() as uow:
+        assert update_user("1", {"points": 20}, uow=uow).points == 20
+        # other readers still see the committed balance
+        assert get_user_by_id("1").points == 100
+
+    assert get_user_by_id("1").points == 100
+    assert read_users_from_csv().set_index("id").at["1", "points"] == 100
+
+
+def test_other_writers_wait_for_an_open_unit_of_work():
+    with UnitOfWork() as uow:
+        update_user("1", {"points": 20}, uow=uow)
+
+        writer = threading.Thread(target=update_user, args=("1", {"name": "Al"}))
+        writer.start()
+        writer.join(timeout=0.2)
+        assert writer.is_alive()
+
+        uow.commit()
+
+    writer.join()
+    # neither write lost the other
+    user = get_user_by_id("1")
+    assert (user.name, user.points) == ("Al", 20)
@@ -0,0 +1,99 @@
+import threading
+
+from app.services.add_transaction import AddTransaction
+from datetime import datetime, timezone
+from app.crud.payer import get_payer_by_id
+from app.crud.user import deduct_user_points, get_user_by_id
+from app.crud.transaction import transactions
+from app.crud.unit_of_work import UnitOfWork
+from app.schemas.transaction import (
+    TransactionDataRequest,
+    TransactionResponseSuccess,
+    TransactionResponseFailed,
+    TransactionErrorCode,
+    TransactionMessage,
+)
+
+
+def test_add_transaction():
+    request = TransactionDataRequest(user_id="1", payer_id="1", points=300, timestamp=datetime.now(timezone.utc))
+
+    response = AddTransaction.add_transaction(request)
+
+    assert isinstance(response, TransactionResponseSuccess)
+    assert response.message == TransactionMessage.MSG_SUCCESS_ADD_TO_USER
+    assert get_user_by_id("1").points == 400
+    assert get_payer_by_id("1").points == 700
+    assert len(transactions.read()) == 3
+
+
+def test_add_transaction_payer_not_enough():
+    request = TransactionDataRequest(user_id="1", payer_id="1", points=10000, timestamp=datetime.now(timezone.utc))
+
+    response = AddTransaction.add_transaction(request)
+
+    assert isinstance(response, TransactionResponseFailed)
+    assert response.error_code == TransactionErrorCode.ERR_FAILED_PAYER_NOT_ENOUGH
+    assert get_user_by_id("1").points == 100
+
+
+def test_add_transaction_rolled_back():
+    request = TransactionDataRequest(user_id="1", payer_id="2", points=-50, timestamp=datetime.now(timezone.utc))
+
+    with UnitOfWork() as uow:
+        response = AddTransaction.add_transaction(request, uow=uow)
+        assert response.message == TransactionMessage.MSG_SUCCESS_DEDUCT_FROM_USER
+
+    # nothing reached the files
+    assert get_user_by_id("1").points == 100
+    assert get_payer_by_id("2").points == 1000
+    assert len(transactions.read()) == 2
+
+
+def test_add_transaction_user_not_enough():
+    request = TransactionDataRequest(user_id="1", payer_id="1", points=-150, timestamp=datetime.now(timezone.utc))
+
+    response = AddTransaction.add_transaction(request)
+
+    assert isinstance(response, TransactionResponseFailed)
+    assert response.error_code == TransactionErrorCode.ERR_FAILED_USER_NOT_ENOUGH
+    assert get_user_by_id("1").points == 100
+    assert get_payer_by_id("1").points == 1000
+
+
+def test_add_transaction_waits_for_a_spend_in_progress():
+    request = TransactionDataRequest(user_id="1", payer_id="1", points=50, timestamp=datetime.now(timezone.utc))
+
+    with UnitOfWork() as uow:
+        deduct_user_points("1", 80, uow=uow)
+
+        adder = threading.Thread(target=AddTransaction.add_transaction, args=(request,))
+        adder.start()
+        adder.join(timeout=0.2)
+        assert adder.is_alive()
+
+        uow.commit()
+
+    adder.join()
+    # the add builds on the committed deduction instead of overwriting it
+    assert get_user_by_id("1").points == 70
+    assert get_payer_by_id("1").points == 950
+
+
+def test_concurrent_adds_cannot_overdraw_payer():
+    responses = []
+
+    def add():
+        request = TransactionDataRequest(user_id="1", payer_id="1", points=600, timestamp=datetime.now(timezone.utc))
+        responses.append(AddTransaction.add_transaction(request))
+
+    threads = [threading.Thread(target=add) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(type(response).__name__ for response in responses) == ["TransactionResponseFailed", "TransactionResponseSuccess"]
+    assert get_payer_by_id("1").points == 400
+    assert get_user_by_id("1").points == 700
+    assert len(transactions.read()) == 3
@@ -0,0 +1,125 @@
+import threading
+from datetime import datetime, timezone
+
+import pytest
+from pydantic import ValidationError
+
+from app.services.spend_points import SpendPoints
+from app.services.add_transaction import AddTransaction
+from app.crud.payer import get_payer_by_id
+from app.crud.user import get_user_by_id
+from app.crud.unit_of_work import UnitOfWork
+from app.crud.transaction import get_all_transactions_with_user_id, read_transactions_from_csv
+from app.schemas.transaction import TransactionDataRequest
+from app.schemas.spend_points import (
+    SpendPointsDataRequest,
+    SpendPointsResponseSuccess,
+    SpendPointsResponseFailed,
+    SpendPointsErrorCode,
+)
+
+
+def spendable_points(user_id: str) -> int:
+    # what is left in the user's live (non-expired, positive) transactions
+    return sum(transaction.points for transaction in get_all_transactions_with_user_id(user_id))
+
+
+def test_spend_points_updates_balances():
+    response = SpendPoints.spend_points(SpendPointsDataRequest(user_id="1", points=70))
+
+    assert isinstance(response, SpendPointsResponseSuccess)
+    assert [(entry.payer, entry.points) for entry in response.data] == [("Amazon", -60), ("Google", -10)]
+    # the user loses exactly what was spent and the payers get it back
+    assert get_user_by_id("1").points == 30
+    assert get_payer_by_id("1").points == 1060
+    assert get_payer_by_id("2").points == 1010
+
+
+def test_spend_points_remainder_does_not_move_balances():
+    SpendPoints.spend_points(SpendPointsDataRequest(user_id="1", points=70))
+
+    # the 30 points left of the Google transaction are re-added to the ledger,
+    # but they never left the user, so neither balance counts them again
+    remainder = read_transactions_from_csv().iloc[-1]
+    assert (remainder["payer_id"], remainder["points"]) == ("2", 30)
+    assert get_user_by_id("1").points == 30
+    assert get_payer_by_id("2").points == 1010
+
+
+def test_spend_points_keeps_balance_in_step_with_ledger():
+    for points in (10, 50, 25, 15):
+        SpendPoints.spend_points(SpendPointsDataRequest(user_id="1", points=points))
+        assert get_user_by_id("1").points == spendable_points("1")
+
+    assert get_user_by_id("1").points == 0
+
+
+def test_spend_points_not_enough():
+    response = SpendPoints.spend_points(SpendPointsDataRequest(user_id="1", points=101))
+
+    assert isinstance(response, SpendPointsResponseFailed)
+    assert response.error_code == SpendPointsErrorCode.ERR_FAILED_NOT_ENOUGH_USER_POINTS
+    assert get_user_by_id("1").points == 100
+    assert spendable_points("1") == 100
+
+
+@pytest.mark.parametrize("points", [0, -5])
+def test_spend_points_rejects_non_positive_amounts(points):
+    with pytest.raises(ValidationError):
+        SpendPointsDataRequest(user_id="1", points=points)
+
+
+def test_concurrent_spends_cannot_overdraw():
+    responses = []
+
+    def spend():
+        responses.append(SpendPoints.spend_points(SpendPointsDataRequest(user_id="1", points=80)))
+
+    threads = [threading.Thread(target=spend) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(type(response).__name__ for response in responses) == ["SpendPointsResponseFailed", "SpendPointsResponseSuccess"]
+    assert get_user_by_id("1").points == 20
+
+
+def test_spend_waits_for_an_add_in_progress():
+    responses = []
+
+    def spend():
+        responses.append(SpendPoints.spend_points(SpendPointsDataRequest(user_id="1", points=120)))
+
+    with UnitOfWork() as uow:
+        AddTransaction.add_transaction(
+            TransactionDataRequest(user_id="1", payer_id="2", points=50, timestamp=datetime.now(timezone.utc)),
+            uow=uow,
+        )
+
+        spender = threading.Thread(target=spend)
+        spender.start()
+        spender.join(timeout=0.2)
+        assert spender.is_alive()
+
+        uow.commit()
+
+    spender.join()
+    # the spend checked against the balance including the add, and neither write was lost
+    assert isinstance(responses[0], SpendPointsResponseSuccess)
+    assert get_user_by_id("1").points == 30
+    assert get_user_by_id("1").points == spendable_points("1")
+
+
+def test_spend_points_with_unknown_payer_changes_nothing(data_dir):
+    # a ledger row whose payer is missing from payers.csv, spent first
+    with open(data_dir / "transactions.csv", "a") as f:
+        f.write("3,9,1,5,2019-01-01 00:00:00+00:00,False\n")
+    ledger = read_transactions_from_csv()
+
+    with pytest.raises(ValueError):
+        SpendPoints.spend_points(SpendPointsDataRequest(user_id="1", points=10))
+
+    assert get_user_by_id("1").points == 100
+    assert get_payer_by_id("1").points == 1000
+    assert read_transactions_from_csv().equals(ledger)